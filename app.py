@@ -3,38 +3,41 @@ import yfinance as yf
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
-from scipy.stats import norm
+from scipy.special import ndtr
 
 st.set_page_config(layout="wide")
 st.title("Calendar Diagonal Spread Analyzer")
 
 # --- Black-Scholes functions to price options and Greeks ---
 
-def d1(S, K, T, r, sigma):
-    return (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
+_INV_SQRT_2PI = 1.0 / np.sqrt(2 * np.pi)
 
-def d2(S, K, T, r, sigma):
-    return d1(S, K, T, r, sigma) - sigma * np.sqrt(T)
+def _norm_pdf(x):
+    return _INV_SQRT_2PI * np.exp(-0.5 * x * x)
+
+def _bs_core(S, K, T, r, sigma):
+    sqrtT = np.sqrt(T)
+    vol = sigma * sqrtT
+    D1 = (np.log(S / K) + (r + 0.5 * sigma * sigma) * T) / vol
+    return D1, D1 - vol, sqrtT, np.exp(-r * T)
 
 def bs_call_price(S, K, T, r, sigma):
-    D1 = d1(S, K, T, r, sigma)
-    D2 = d2(S, K, T, r, sigma)
-    return S * norm.cdf(D1) - K * np.exp(-r * T) * norm.cdf(D2)
+    D1, D2, _, disc = _bs_core(S, K, T, r, sigma)
+    return S * ndtr(D1) - K * disc * ndtr(D2)
 
 def bs_vega(S, K, T, r, sigma):
-    D1 = d1(S, K, T, r, sigma)
-    return S * norm.pdf(D1) * np.sqrt(T)
+    D1, _, sqrtT, _ = _bs_core(S, K, T, r, sigma)
+    return S * _norm_pdf(D1) * sqrtT
 
 def bs_theta(S, K, T, r, sigma):
-    D1 = d1(S, K, T, r, sigma)
-    D2 = d2(S, K, T, r, sigma)
-    term1 = - (S * norm.pdf(D1) * sigma) / (2 * np.sqrt(T))
-    term2 = - r * K * np.exp(-r * T) * norm.cdf(D2)
+    D1, D2, sqrtT, disc = _bs_core(S, K, T, r, sigma)
+    term1 = - (S * _norm_pdf(D1) * sigma) / (2 * sqrtT)
+    term2 = - r * K * disc * ndtr(D2)
     return term1 + term2
 
 def bs_delta(S, K, T, r, sigma):
-    D1 = d1(S, K, T, r, sigma)
-    return norm.cdf(D1)
+    D1, _, _, _ = _bs_core(S, K, T, r, sigma)
+    return ndtr(D1)
 
 def option_payoff_call(price, strike):
     return np.maximum(price - strike, 0)
@@ -72,12 +75,18 @@ short_chain = stock.option_chain(short_expiry)
 long_chain = stock.option_chain(long_expiry)
 
 # Extract call strikes (you can extend to puts easily)
-short_strikes = sorted(short_chain.calls['strike'].unique())
-long_strikes = sorted(long_chain.calls['strike'].unique())
+short_strikes = np.unique(short_chain.calls['strike'].to_numpy())
+long_strikes = np.unique(long_chain.calls['strike'].to_numpy())
 
-# Slider defaults near spot price
+# Slider defaults near spot price (strikes must be sorted)
 def closest_strike(strikes, price):
-    return min(strikes, key=lambda x: abs(x - price))
+    i = np.searchsorted(strikes, price)
+    if i == 0:
+        return strikes[0]
+    if i == len(strikes):
+        return strikes[-1]
+    # Ties go to the lower strike
+    return strikes[i] if strikes[i] - price < price - strikes[i - 1] else strikes[i - 1]
 
 default_short_strike = closest_strike(short_strikes, spot_price)
 default_long_strike = closest_strike(long_strikes, spot_price)
@@ -133,32 +142,10 @@ st.write(f"**Net Delta:** {net_delta:.3f}")
 st.write(f"**Net Theta (per year):** {net_theta:.3f}")
 st.write(f"**Net Vega:** {net_vega:.3f}")
 
-# Plot P/L curve at short expiry - zoomed in view
-price_range = np.linspace(500, 800, 200)  # Fixed range 500-800
-
+# Plot P/L curve at short expiry
 def payoff_at_expiry(price, strike):
     return np.maximum(price - strike, 0)
 
-pl_curve = []
-for p in price_range:
-    # Short option at expiry: either expires worthless or we pay intrinsic value
-    short_payoff = payoff_at_expiry(p, short_strike)
-    
-    # Long option at short expiry: still has time value remaining
-    # Calculate remaining time to long expiry
-    T_remaining = T_long - T_short
-    
-    if T_remaining > 0:
-        # Long option still has time value - use Black-Scholes
-        long_val = bs_call_price(p, long_strike, T_remaining, r, long_sigma)
-    else:
-        # Long option also expires (shouldn't happen in calendar spread)
-        long_val = payoff_at_expiry(p, long_strike)
-    
-    # P/L = Long option value - Short option payoff - Initial net debit
-    pl = long_val - short_payoff - net_premium
-    pl_curve.append(pl)
-
 # Add zoom controls
 col1, col2, col3 = st.columns([1, 2, 1])
 with col1:
@@ -178,19 +165,21 @@ else:  # Wide View
     x_min, x_max = spot_price * 0.5, spot_price * 1.5
     y_min, y_max = None, None
 
-# Recalculate P/L curve for new range
-pl_curve = []
-for p in price_range:
-    short_payoff = payoff_at_expiry(p, short_strike)
-    T_remaining = T_long - T_short
-    
-    if T_remaining > 0:
-        long_val = bs_call_price(p, long_strike, T_remaining, r, long_sigma)
-    else:
-        long_val = payoff_at_expiry(p, long_strike)
-    
-    pl = long_val - short_payoff - net_premium
-    pl_curve.append(pl)
+# Calculate P/L curve for the whole price range in one vectorized pass
+# Short option at expiry: either expires worthless or we pay intrinsic value
+short_payoff = payoff_at_expiry(price_range, short_strike)
+
+# Long option at short expiry: still has time value remaining
+T_remaining = T_long - T_short
+if T_remaining > 0:
+    # Long option still has time value - use Black-Scholes
+    long_val = bs_call_price(price_range, long_strike, T_remaining, r, long_sigma)
+else:
+    # Long option also expires (shouldn't happen in calendar spread)
+    long_val = payoff_at_expiry(price_range, long_strike)
+
+# P/L = Long option value - Short option payoff - Initial net debit
+pl_curve = long_val - short_payoff - net_premium
 
 fig, ax = plt.subplots(figsize=(12, 6))
 ax.plot(price_range, pl_curve, label="P/L at Short Expiry", linewidth=2, color='blue')
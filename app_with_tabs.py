@@ -1,11 +1,13 @@
 import streamlit as st
-import yfinance as yf
 import numpy as np
-import matplotlib.pyplot as plt
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import io
 import os
+import re
 from datetime import datetime
-from scipy.stats import norm
+from scipy.special import ndtr
 
 st.set_page_config(layout="wide")
 st.title("Options Analysis Platform")
@@ -15,130 +17,246 @@ tab1, tab2 = st.tabs(["📊 Options Analyzer", "📈 Data Visualizer"])
 
 # --- Black-Scholes functions to price options and Greeks ---
 
-def d1(S, K, T, r, sigma):
-    return (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
+_INV_SQRT_2PI = 1.0 / np.sqrt(2 * np.pi)
 
-def d2(S, K, T, r, sigma):
-    return d1(S, K, T, r, sigma) - sigma * np.sqrt(T)
+def _norm_pdf(x):
+    return _INV_SQRT_2PI * np.exp(-0.5 * x * x)
+
+def _bs_core(S, K, T, r, sigma):
+    sqrtT = np.sqrt(T)
+    vol = sigma * sqrtT
+    D1 = (np.log(S / K) + (r + 0.5 * sigma * sigma) * T) / vol
+    return D1, D1 - vol, sqrtT, np.exp(-r * T)
 
 def bs_call_price(S, K, T, r, sigma):
-    D1 = d1(S, K, T, r, sigma)
-    D2 = d2(S, K, T, r, sigma)
-    return S * norm.cdf(D1) - K * np.exp(-r * T) * norm.cdf(D2)
+    D1, D2, _, disc = _bs_core(S, K, T, r, sigma)
+    return S * ndtr(D1) - K * disc * ndtr(D2)
 
 def bs_vega(S, K, T, r, sigma):
-    D1 = d1(S, K, T, r, sigma)
-    return S * norm.pdf(D1) * np.sqrt(T)
+    D1, _, sqrtT, _ = _bs_core(S, K, T, r, sigma)
+    return S * _norm_pdf(D1) * sqrtT
 
 def bs_theta(S, K, T, r, sigma):
-    D1 = d1(S, K, T, r, sigma)
-    D2 = d2(S, K, T, r, sigma)
-    term1 = - (S * norm.pdf(D1) * sigma) / (2 * np.sqrt(T))
-    term2 = - r * K * np.exp(-r * T) * norm.cdf(D2)
+    D1, D2, sqrtT, disc = _bs_core(S, K, T, r, sigma)
+    term1 = - (S * _norm_pdf(D1) * sigma) / (2 * sqrtT)
+    term2 = - r * K * disc * ndtr(D2)
     return term1 + term2
 
 def bs_delta(S, K, T, r, sigma):
-    D1 = d1(S, K, T, r, sigma)
-    return norm.cdf(D1)
+    D1, _, _, _ = _bs_core(S, K, T, r, sigma)
+    return ndtr(D1)
 
 def option_payoff_call(price, strike):
     return np.maximum(price - strike, 0)
 
+# --- Yahoo Finance helpers (cached across reruns) ---
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_spot_and_expirations(ticker):
+    """Fetch the latest close and the available option expirations."""
+    import yfinance as yf
+    stock = yf.Ticker(ticker)
+    spot_price = stock.history(period="1d")['Close'].iloc[-1]
+    return float(spot_price), tuple(stock.options)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_option_chain(ticker, expiry):
+    """Fetch the (calls, puts) DataFrames for one expiry; calls are indexed by strike."""
+    import yfinance as yf
+    chain = yf.Ticker(ticker).option_chain(expiry)
+    calls = chain.calls.set_index('strike', drop=False).sort_index()
+    calls = calls[~calls.index.duplicated()]
+    return calls, chain.puts
+
 # --- Data Visualizer Functions ---
 
-def load_stock_data(filepath):
-    """Load stock data from CSV file."""
+def _pyplot():
+    """Import pyplot on first use, on the non-interactive Agg backend."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+# Narrow dtypes for the columns the visualizer uses. Stock Volume stays int64
+# (index volumes such as ^SPX overflow int32); option volume/openInterest use
+# float32 because they contain NaNs that matplotlib cannot draw as pd.NA.
+STOCK_DTYPES = {'Open': 'float32', 'High': 'float32', 'Low': 'float32',
+                'Close': 'float32', 'Adj Close': 'float32'}
+OPTIONS_DTYPES = {'strike': 'float32', 'lastPrice': 'float32', 'impliedVolatility': 'float32',
+                  'volume': 'float32', 'openInterest': 'float32', 'Option_Type': 'category'}
+
+# Columns the charts and metrics need; the data tables reload with cols=None
+STOCK_PLOT_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+OPTIONS_PLOT_COLUMNS = ('strike', 'lastPrice', 'impliedVolatility', 'volume',
+                        'openInterest', 'Option_Type', 'Fetched_At')
+
+def _header_columns(filepath):
+    """Read just the CSV header row."""
+    with open(filepath, newline='') as f:
+        return f.readline().rstrip('\r\n').split(',')
+
+# Trailing UTC offset of an ISO 8601 timestamp ('Z', '+09:00', '-0400')
+_UTC_OFFSET_PATTERN = r'(?:Z|[+-]\d{2}:?\d{2})$'
+
+def _local_datetime_index(values):
+    """Parse ISO 8601 timestamps in the file's own UTC offset, or as wall-clock times if it varies."""
+    offsets = values.str.extract(f'({_UTC_OFFSET_PATTERN})', expand=False)
+    if offsets.notna().all() and offsets.nunique() == 1:
+        return pd.to_datetime(values, format='ISO8601')
+    # Mixed offsets (e.g. across DST) or none: keep the exchange-local wall clock
+    return pd.to_datetime(values.str.replace(_UTC_OFFSET_PATTERN, '', regex=True), format='ISO8601')
+
+@st.cache_data(show_spinner=False)
+def load_stock_data(filepath, mtime=None, cols=STOCK_PLOT_COLUMNS):
+    """Load stock data from CSV file (mtime only keys the cache)."""
     try:
-        data = pd.read_csv(filepath, index_col=0, parse_dates=True)
+        # Keep the index column whatever it is named (Date vs Datetime)
+        header = _header_columns(filepath)
+        usecols = header if cols is None else header[:1] + [c for c in header[1:] if c in cols]
+        # Read the dates as text: pyarrow's timestamp inference converts them to UTC,
+        # which puts bars from exchanges ahead of UTC on the previous day
+        column_types = {header[0]: pa.string(), **{c: pa.float32() for c in STOCK_DTYPES}}
+        convert_options = pa_csv.ConvertOptions(include_columns=usecols, column_types=column_types)
+        data = pa_csv.read_csv(filepath, convert_options=convert_options).to_pandas().set_index(header[0])
+        data.index = _local_datetime_index(data.index)
         return data
     except Exception as e:
         st.error(f"Error loading stock data: {e}")
         return pd.DataFrame()
 
-def load_options_data(filepath):
-    """Load options data from CSV file."""
+@st.cache_data(show_spinner=False)
+def load_options_data(filepath, mtime=None, cols=OPTIONS_PLOT_COLUMNS):
+    """Load options data from CSV file (mtime only keys the cache)."""
     try:
-        data = pd.read_csv(filepath, parse_dates=['Fetched_At'])
+        usecols = None
+        if cols is not None:
+            usecols = [c for c in _header_columns(filepath) if c in cols]
+        data = pd.read_csv(filepath, parse_dates=['Fetched_At'], usecols=usecols,
+                           dtype=OPTIONS_DTYPES, engine='pyarrow')
         return data
     except Exception as e:
         st.error(f"Error loading options data: {e}")
         return pd.DataFrame()
 
+# stock_data_SYMBOL_PERIOD_INTERVAL_TIMESTAMP.csv
+_STOCK_FILE_RE = re.compile(r'^[^_]+_[^_]+_([^_]+)_.*\.csv$')
+# options_data_SYMBOL_EXPIRY_TYPE_TIMESTAMP.csv
+_OPTIONS_FILE_RE = re.compile(r'^[^_]+_[^_]+_([^_]+)_([^_]*)_.*\.csv$')
+
+def _match_data_files(directory, pattern):
+    """Return (filename, *groups) rows for the files in directory matching pattern."""
+    with os.scandir(directory) as entries:
+        names = pd.Index([entry.name for entry in entries if entry.is_file()], dtype=object)
+    groups = names.str.extract(pattern)
+    groups.insert(0, 'name', names.to_numpy())
+    return groups[groups[0].notna()].itertuples(index=False, name=None)
+
+@st.cache_data(ttl=10, show_spinner=False)
 def list_available_data():
     """List all available data files."""
     data_dir = "data"
     available_data = {}
     
-    if not os.path.exists(data_dir):
+    # One scandir per directory instead of separate exists/listdir calls
+    try:
+        with os.scandir(data_dir) as entries:
+            subdirs = {entry.name: entry.path for entry in entries if entry.is_dir()}
+    except FileNotFoundError:
         return available_data
     
     # Get stock files
-    stocks_dir = os.path.join(data_dir, "stocks")
-    if os.path.exists(stocks_dir):
-        stock_files = [f for f in os.listdir(stocks_dir) if f.endswith('.csv')]
-        for file in stock_files:
-            parts = file.replace('.csv', '').split('_')
-            if len(parts) >= 4:
-                symbol = parts[2]
-                if symbol not in available_data:
-                    available_data[symbol] = {'stocks': [], 'options': []}
-                available_data[symbol]['stocks'].append(file)
+    if "stocks" in subdirs:
+        for name, symbol in _match_data_files(subdirs["stocks"], _STOCK_FILE_RE):
+            available_data.setdefault(symbol, {'stocks': [], 'options': [], 'options_by_expiry': {}})['stocks'].append(name)
     
-    # Get options files
-    options_dir = os.path.join(data_dir, "options")
-    if os.path.exists(options_dir):
-        options_files = [f for f in os.listdir(options_dir) if f.endswith('.csv')]
-        for file in options_files:
-            parts = file.replace('.csv', '').split('_')
-            if len(parts) >= 5:
-                symbol = parts[2]
-                if symbol not in available_data:
-                    available_data[symbol] = {'stocks': [], 'options': []}
-                available_data[symbol]['options'].append(file)
+    # Get options files, grouped by expiry as well so tab2 never re-parses names
+    if "options" in subdirs:
+        for name, symbol, expiry in _match_data_files(subdirs["options"], _OPTIONS_FILE_RE):
+            symbol_files = available_data.setdefault(symbol, {'stocks': [], 'options': [], 'options_by_expiry': {}})
+            symbol_files['options'].append(name)
+            symbol_files['options_by_expiry'].setdefault(expiry, []).append(name)
     
     return available_data
 
+def _figure_to_png(fig):
+    """Render a figure to PNG bytes and free it."""
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=100, bbox_inches='tight')
+    _pyplot().close(fig)
+    return buf.getvalue()
+
+@st.cache_data(show_spinner=False)
 def plot_stock_data(data, symbol):
-    """Plot stock price data."""
+    """Plot stock price data, returned as PNG bytes."""
     if data.empty:
         return None
     
+    plt = _pyplot()
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8))
     
+    # Long or intraday histories have far more points than a full-width chart
+    # can show; plot every n-th row to keep at most ~2000 points per line and
+    # ~500 volume bars (each bar is a separate matplotlib patch).
+    n = len(data)
+    line_step = max(1, n // 2000)
+    bar_step = max(1, n // 500)
+    
     # Price chart
-    ax1.plot(data.index, data['Close'], label='Close Price', linewidth=2)
-    ax1.plot(data.index, data['High'], label='High', alpha=0.7, linewidth=1)
-    ax1.plot(data.index, data['Low'], label='Low', alpha=0.7, linewidth=1)
+    dates = data.index[::line_step]
+    ax1.plot(dates, data['Close'].to_numpy()[::line_step], label='Close Price', linewidth=2)
+    ax1.plot(dates, data['High'].to_numpy()[::line_step], label='High', alpha=0.7, linewidth=1)
+    ax1.plot(dates, data['Low'].to_numpy()[::line_step], label='Low', alpha=0.7, linewidth=1)
     ax1.set_title(f'{symbol} Stock Price History')
     ax1.set_ylabel('Price ($)')
     ax1.legend()
     ax1.grid(True, alpha=0.3)
     
     # Volume chart
-    ax2.bar(data.index, data['Volume'], alpha=0.7, color='orange')
+    ax2.bar(data.index[::bar_step], data['Volume'].to_numpy()[::bar_step], alpha=0.7, color='orange')
     ax2.set_title(f'{symbol} Trading Volume')
     ax2.set_ylabel('Volume')
     ax2.set_xlabel('Date')
     ax2.grid(True, alpha=0.3)
     
     plt.tight_layout()
-    return fig
+    return _figure_to_png(fig)
 
+def _strike_bars(ax, strikes, heights, **kwargs):
+    """Bar chart per strike; long chains are drawn as one vlines collection."""
+    if len(strikes) > 200:
+        ax.vlines(strikes, 0, heights, **kwargs)
+    else:
+        ax.bar(strikes, heights, **kwargs)
+
+@st.cache_data(show_spinner=False)
 def plot_options_data(data, symbol, expiry):
-    """Plot options data."""
+    """Plot options data, returned as PNG bytes."""
     if data.empty:
         return None
     
+    plt = _pyplot()
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
     
-    # Strike vs Price
-    calls = data[data['Option_Type'] == 'call']
-    puts = data[data['Option_Type'] == 'put']
+    # Pull the plotted columns out of pandas once and split them with masks
+    is_call = data['Option_Type'].eq('call').to_numpy()
+    is_put = data['Option_Type'].eq('put').to_numpy()
+    strike = data['strike'].to_numpy()
+    last_price = data['lastPrice'].to_numpy()
+    cols = data.columns
+    has_iv = 'impliedVolatility' in cols
+    has_vol = 'volume' in cols
+    has_oi = 'openInterest' in cols
+    has_calls = is_call.any()
+    has_puts = is_put.any()
+    iv = data['impliedVolatility'].to_numpy() if has_iv else None
+    volume = data['volume'].to_numpy() if has_vol else None
+    open_interest = data['openInterest'].to_numpy() if has_oi else None
     
-    if not calls.empty:
-        ax1.scatter(calls['strike'], calls['lastPrice'], alpha=0.6, label='Calls', color='green')
-    if not puts.empty:
-        ax1.scatter(puts['strike'], puts['lastPrice'], alpha=0.6, label='Puts', color='red')
+    # Strike vs Price
+    if has_calls:
+        ax1.plot(strike[is_call], last_price[is_call], marker='o', markersize=5, linestyle='', alpha=0.6, label='Calls', color='green')
+    if has_puts:
+        ax1.plot(strike[is_put], last_price[is_put], marker='o', markersize=5, linestyle='', alpha=0.6, label='Puts', color='red')
     ax1.set_title(f'{symbol} Options - Strike vs Price ({expiry})')
     ax1.set_xlabel('Strike Price ($)')
     ax1.set_ylabel('Option Price ($)')
@@ -146,10 +264,10 @@ def plot_options_data(data, symbol, expiry):
     ax1.grid(True, alpha=0.3)
     
     # Implied Volatility
-    if not calls.empty and 'impliedVolatility' in calls.columns:
-        ax2.scatter(calls['strike'], calls['impliedVolatility'], alpha=0.6, label='Calls', color='green')
-    if not puts.empty and 'impliedVolatility' in puts.columns:
-        ax2.scatter(puts['strike'], puts['impliedVolatility'], alpha=0.6, label='Puts', color='red')
+    if has_calls and has_iv:
+        ax2.plot(strike[is_call], iv[is_call], marker='o', markersize=5, linestyle='', alpha=0.6, label='Calls', color='green')
+    if has_puts and has_iv:
+        ax2.plot(strike[is_put], iv[is_put], marker='o', markersize=5, linestyle='', alpha=0.6, label='Puts', color='red')
     ax2.set_title(f'{symbol} Implied Volatility ({expiry})')
     ax2.set_xlabel('Strike Price ($)')
     ax2.set_ylabel('Implied Volatility')
@@ -157,10 +275,10 @@ def plot_options_data(data, symbol, expiry):
     ax2.grid(True, alpha=0.3)
     
     # Volume
-    if not calls.empty and 'volume' in calls.columns:
-        ax3.bar(calls['strike'], calls['volume'], alpha=0.6, label='Calls', color='green')
-    if not puts.empty and 'volume' in puts.columns:
-        ax3.bar(puts['strike'], puts['volume'], alpha=0.6, label='Puts', color='red')
+    if has_calls and has_vol:
+        _strike_bars(ax3, strike[is_call], volume[is_call], alpha=0.6, label='Calls', color='green')
+    if has_puts and has_vol:
+        _strike_bars(ax3, strike[is_put], volume[is_put], alpha=0.6, label='Puts', color='red')
     ax3.set_title(f'{symbol} Options Volume ({expiry})')
     ax3.set_xlabel('Strike Price ($)')
     ax3.set_ylabel('Volume')
@@ -168,10 +286,10 @@ def plot_options_data(data, symbol, expiry):
     ax3.grid(True, alpha=0.3)
     
     # Open Interest
-    if not calls.empty and 'openInterest' in calls.columns:
-        ax4.bar(calls['strike'], calls['openInterest'], alpha=0.6, label='Calls', color='green')
-    if not puts.empty and 'openInterest' in puts.columns:
-        ax4.bar(puts['strike'], puts['openInterest'], alpha=0.6, label='Puts', color='red')
+    if has_calls and has_oi:
+        _strike_bars(ax4, strike[is_call], open_interest[is_call], alpha=0.6, label='Calls', color='green')
+    if has_puts and has_oi:
+        _strike_bars(ax4, strike[is_put], open_interest[is_put], alpha=0.6, label='Puts', color='red')
     ax4.set_title(f'{symbol} Open Interest ({expiry})')
     ax4.set_xlabel('Strike Price ($)')
     ax4.set_ylabel('Open Interest')
@@ -179,7 +297,7 @@ def plot_options_data(data, symbol, expiry):
     ax4.grid(True, alpha=0.3)
     
     plt.tight_layout()
-    return fig
+    return _figure_to_png(fig)
 
 # --- TAB 1: Options Analyzer (Original functionality) ---
 
@@ -192,9 +310,7 @@ with tab1:
 
     # Fetch stock data and option expirations
     try:
-        stock = yf.Ticker(ticker)
-        spot_price = stock.history(period="1d")['Close'].iloc[-1]
-        expirations = stock.options
+        spot_price, expirations = fetch_spot_and_expirations(ticker)
         if len(expirations) < 2:
             st.error("Not enough option expirations available for calendar spreads.")
             st.stop()
@@ -208,21 +324,31 @@ with tab1:
     short_expiry = st.selectbox("Select Short Leg Expiry", expirations, index=0)
     long_expiry = st.selectbox("Select Long Leg Expiry", expirations, index=len(expirations)-1)
 
-    if datetime.strptime(long_expiry, '%Y-%m-%d') <= datetime.strptime(short_expiry, '%Y-%m-%d'):
+    # Expiries are ISO dates (YYYY-MM-DD); parse each once
+    short_expiry_date = datetime.fromisoformat(short_expiry)
+    long_expiry_date = datetime.fromisoformat(long_expiry)
+
+    if long_expiry_date <= short_expiry_date:
         st.warning("Long leg expiry should be after short leg expiry.")
         st.stop()
 
     # Load option chains
-    short_chain = stock.option_chain(short_expiry)
-    long_chain = stock.option_chain(long_expiry)
+    short_calls, _ = fetch_option_chain(ticker, short_expiry)
+    long_calls, _ = fetch_option_chain(ticker, long_expiry)
 
     # Extract call strikes (you can extend to puts easily)
-    short_strikes = sorted(short_chain.calls['strike'].unique())
-    long_strikes = sorted(long_chain.calls['strike'].unique())
+    short_strikes = short_calls.index.to_numpy()
+    long_strikes = long_calls.index.to_numpy()
 
-    # Slider defaults near spot price
+    # Slider defaults near spot price (strikes must be sorted)
     def closest_strike(strikes, price):
-        return min(strikes, key=lambda x: abs(x - price))
+        i = np.searchsorted(strikes, price)
+        if i == 0:
+            return strikes[0]
+        if i == len(strikes):
+            return strikes[-1]
+        # Ties go to the lower strike
+        return strikes[i] if strikes[i] - price < price - strikes[i - 1] else strikes[i - 1]
 
     default_short_strike = closest_strike(short_strikes, spot_price)
     default_long_strike = closest_strike(long_strikes, spot_price)
@@ -233,21 +359,18 @@ with tab1:
     # Risk-free rate and volatility (simplified assumptions)
     r = 0.03  # 3% annual risk-free
     # Use implied volatility from yfinance if available, else estimate from historical
-    short_iv = short_chain.calls.loc[short_chain.calls['strike'] == short_strike, 'impliedVolatility']
-    long_iv = long_chain.calls.loc[long_chain.calls['strike'] == long_strike, 'impliedVolatility']
-
-    if short_iv.empty or long_iv.empty:
+    try:
+        short_sigma = float(short_calls.at[short_strike, 'impliedVolatility'])
+        long_sigma = float(long_calls.at[long_strike, 'impliedVolatility'])
+    except KeyError:
         st.warning("Could not get implied volatility for selected strikes; using 25% as fallback.")
         short_sigma = 0.25
         long_sigma = 0.25
-    else:
-        short_sigma = float(short_iv.iloc[0])
-        long_sigma = float(long_iv.iloc[0])
 
     # Calculate time to expiry in years
     today = datetime.today()
-    T_short = (datetime.strptime(short_expiry, '%Y-%m-%d') - today).days / 365
-    T_long = (datetime.strptime(long_expiry, '%Y-%m-%d') - today).days / 365
+    T_short = (short_expiry_date - today).days / 365
+    T_long = (long_expiry_date - today).days / 365
 
     if T_short <= 0 or T_long <= 0:
         st.error("Selected expirations are in the past or today.")
@@ -301,37 +424,40 @@ with tab1:
         x_min, x_max = spot_price * 0.5, spot_price * 1.5
         y_min, y_max = None, None
 
-    # Calculate P/L curve for selected range
-    pl_curve = []
-    for p in price_range:
-        short_payoff = payoff_at_expiry(p, short_strike)
-        T_remaining = T_long - T_short
-        
-        if T_remaining > 0:
-            long_val = bs_call_price(p, long_strike, T_remaining, r, long_sigma)
-        else:
-            long_val = payoff_at_expiry(p, long_strike)
-        
-        pl = long_val - short_payoff - net_premium
-        pl_curve.append(pl)
-
-    fig, ax = plt.subplots(figsize=(12, 6))
-    ax.plot(price_range, pl_curve, label="P/L at Short Expiry", linewidth=2, color='blue')
-    ax.axhline(0, color='black', lw=0.7, alpha=0.7)
-    ax.axvline(spot_price, color='gray', ls='--', label="Spot Price", alpha=0.7)
-    ax.set_xlabel("Underlying Price at Short Expiry")
-    ax.set_ylabel("Profit / Loss ($)")
-    ax.set_title(f"Calendar Diagonal Spread P/L for {ticker} - {zoom_level}")
-    ax.set_xlim(x_min, x_max)
-    if y_min is not None and y_max is not None:
-        ax.set_ylim(y_min, y_max)
-    ax.legend()
-    ax.grid(True, alpha=0.3)
+    # Calculate P/L curve for the whole price range in one vectorized pass
+    short_payoff = payoff_at_expiry(price_range, short_strike)
+    T_remaining = T_long - T_short
+
+    if T_remaining > 0:
+        long_val = bs_call_price(price_range, long_strike, T_remaining, r, long_sigma)
+    else:
+        long_val = payoff_at_expiry(price_range, long_strike)
+
+    pl_curve = long_val - short_payoff - net_premium
+
+    # Altair (bundled with Streamlit) renders client-side, so pan/zoom need no rerun
+    import altair as alt
+    x_scale = alt.Scale(domain=[x_min, x_max])
+    y_scale = alt.Scale(domain=[y_min, y_max]) if y_min is not None and y_max is not None else alt.Undefined
+    pl_line = alt.Chart(pd.DataFrame({'price': price_range, 'pl': pl_curve})).mark_line(
+        color='blue', strokeWidth=2, clip=True
+    ).encode(
+        x=alt.X('price:Q', title="Underlying Price at Short Expiry", scale=x_scale),
+        y=alt.Y('pl:Q', title="Profit / Loss ($)", scale=y_scale),
+        tooltip=[alt.Tooltip('price:Q', format='.2f'), alt.Tooltip('pl:Q', format='.2f')],
+    )
+    zero_line = alt.Chart(pd.DataFrame({'pl': [0.0]})).mark_rule(color='black', opacity=0.7).encode(y='pl:Q')
+    spot_line = alt.Chart(pd.DataFrame({'price': [spot_price]})).mark_rule(
+        color='gray', strokeDash=[6, 4], opacity=0.7
+    ).encode(x='price:Q')
+    chart = alt.layer(pl_line, zero_line, spot_line).properties(
+        title=f"Calendar Diagonal Spread P/L for {ticker} - {zoom_level}", height=450
+    ).interactive()
 
     # Add zoom instructions
     st.caption("🔍 **Zoom Controls**: Use the dropdown above to change zoom level. You can also use mouse wheel to zoom in/out on the chart.")
 
-    st.pyplot(fig)
+    st.altair_chart(chart, use_container_width=True)
 
 # --- TAB 2: Data Visualizer ---
 
@@ -369,7 +495,7 @@ with tab2:
                 stock_file = st.selectbox("Select Stock File", symbol_data['stocks'])
                 if stock_file:
                     filepath = os.path.join("data/stocks", stock_file)
-                    stock_data = load_stock_data(filepath)
+                    stock_data = load_stock_data(filepath, os.path.getmtime(filepath))
                     
                     if not stock_data.empty:
                         # Display basic info
@@ -385,13 +511,13 @@ with tab2:
                             st.metric("Total Return", f"{price_change:.2f}%")
                         
                         # Plot stock data
-                        fig = plot_stock_data(stock_data, selected_symbol)
-                        if fig:
-                            st.pyplot(fig)
+                        chart = plot_stock_data(stock_data, selected_symbol)
+                        if chart:
+                            st.image(chart, use_container_width=True)
                         
                         # Show data table
                         if st.checkbox("Show Stock Data Table"):
-                            st.dataframe(stock_data)
+                            st.dataframe(load_stock_data(filepath, os.path.getmtime(filepath), cols=None))
                     else:
                         st.error("Failed to load stock data")
             
@@ -399,15 +525,8 @@ with tab2:
             if symbol_data['options']:
                 st.subheader("📈 Options Data")
                 
-                # Group options files by expiry
-                options_by_expiry = {}
-                for file in symbol_data['options']:
-                    parts = file.replace('.csv', '').split('_')
-                    if len(parts) >= 5:
-                        expiry = parts[3]  # Extract expiry from filename
-                        if expiry not in options_by_expiry:
-                            options_by_expiry[expiry] = []
-                        options_by_expiry[expiry].append(file)
+                # Options files grouped by expiry (built once in list_available_data)
+                options_by_expiry = symbol_data['options_by_expiry']
                 
                 if options_by_expiry:
                     # Select expiry
@@ -417,14 +536,18 @@ with tab2:
                         expiry_files = options_by_expiry[selected_expiry]
                         
                         # Load and combine calls and puts for this expiry
-                        combined_options = pd.DataFrame()
+                        options_frames = []
                         for file in expiry_files:
                             filepath = os.path.join("data/options", file)
-                            options_data = load_options_data(filepath)
+                            options_data = load_options_data(filepath, os.path.getmtime(filepath))
                             if not options_data.empty:
-                                combined_options = pd.concat([combined_options, options_data], ignore_index=True)
+                                options_frames.append(options_data)
+                        combined_options = pd.concat(options_frames, ignore_index=True) if options_frames else pd.DataFrame()
                         
                         if not combined_options.empty:
+                            # Per-file categories differ, so concat falls back to object
+                            combined_options['Option_Type'] = combined_options['Option_Type'].astype('category')
+
                             # Display options info
                             calls = combined_options[combined_options['Option_Type'] == 'call']
                             puts = combined_options[combined_options['Option_Type'] == 'put']
@@ -441,13 +564,18 @@ with tab2:
                                     st.metric("Strike Range", f"${combined_options['strike'].min():.0f} - ${combined_options['strike'].max():.0f}")
                             
                             # Plot options data
-                            fig = plot_options_data(combined_options, selected_symbol, selected_expiry)
-                            if fig:
-                                st.pyplot(fig)
+                            chart = plot_options_data(combined_options, selected_symbol, selected_expiry)
+                            if chart:
+                                st.image(chart, use_container_width=True)
                             
                             # Show data table
                             if st.checkbox("Show Options Data Table"):
-                                st.dataframe(combined_options)
+                                # The table shows every column, so reload without usecols
+                                table_frames = []
+                                for file in expiry_files:
+                                    filepath = os.path.join("data/options", file)
+                                    table_frames.append(load_options_data(filepath, os.path.getmtime(filepath), cols=None))
+                                st.dataframe(pd.concat(table_frames, ignore_index=True))
                         else:
                             st.error("Failed to load options data")
                 else:
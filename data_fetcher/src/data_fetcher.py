@@ -4,38 +4,249 @@ Data fetcher module for downloading and storing historical stock/ETF and options
 
 import yfinance as yf
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import io
 import os
+import sys
+import glob
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Optional, Dict, Tuple
 import logging
+import hashlib
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Extensions of the files written by save_stock_data/save_options_data
+DATA_FILE_EXTENSIONS = ('.csv', '.parquet')
+
+# Response cache lifetimes in seconds
+DAILY_STOCK_CACHE_TTL = 24 * 60 * 60
+INTRADAY_STOCK_CACHE_TTL = 5 * 60
+OPTIONS_CACHE_TTL = 15 * 60
+DAILY_INTERVALS = ('1d', '5d', '1wk', '1mo', '3mo')
+
+# Symbols per yf.download request
+STOCK_BATCH_SIZE = 20
+# Corporate-action columns; a batch frame carries every symbol's set (e.g. a fund's
+# Capital Gains), which Ticker.history only returns for symbols that have them
+ACTION_COLUMNS = ('Dividends', 'Stock Splits', 'Capital Gains')
+
+# Options requests in flight at once across all threads; the per-symbol and
+# per-expiry pools nest, and Yahoo answers larger bursts with 429s
+MAX_CONCURRENT_OPTIONS_REQUESTS = 16
+_options_request_slots = threading.BoundedSemaphore(MAX_CONCURRENT_OPTIONS_REQUESTS)
+
+# Constant per-file columns that Parquet files keep as key/value schema metadata
+METADATA_COLUMNS = {'Symbol': b'symbol', 'Period': b'period', 'Interval': b'interval',
+                    'Data_Type': b'data_type', 'Fetched_At': b'fetched_at'}
+# Schema metadata keys recording where those columns sat and which were categorical
+COLUMN_ORDER_KEY = b'column_order'
+CATEGORY_COLUMNS_KEY = b'category_columns'
+
+
+_timestamp_lock = threading.Lock()
+_last_timestamp_us = 0
+
+
+def _file_timestamp() -> str:
+    """Filename timestamp YYYYmmdd_HHMMSSffffff, strictly increasing within the process."""
+    # Saves in the same second (e.g. from the fetch thread pool) no longer collide,
+    # and the names still sort after the older YYYYmmdd_HHMMSS ones
+    global _last_timestamp_us
+    with _timestamp_lock:
+        _last_timestamp_us = max(time.time_ns() // 1000, _last_timestamp_us + 1)
+        value = _last_timestamp_us
+    seconds, micros = divmod(value, 1_000_000)
+    return f"{datetime.fromtimestamp(seconds):%Y%m%d_%H%M%S}{micros:06d}"
+
+
+def _constant_category(value: str, index: pd.Index) -> pd.Series:
+    """A single-valued categorical column (one code per row instead of a string)."""
+    return pd.Series(value, index=index, dtype='category')
+
+
+# Explicit types for the options CSV columns, so pyarrow's reader skips type
+# inference and datetime guessing; columns missing from a file are ignored.
+# volume/openInterest are float because NaN counts are written as e.g. '1.0'
+_CATEGORY = pa.dictionary(pa.int32(), pa.string())
+OPTIONS_CSV_COLUMN_TYPES = {
+    'contractSymbol': pa.string(), 'lastTradeDate': pa.string(),
+    'strike': pa.float64(), 'lastPrice': pa.float64(), 'bid': pa.float64(), 'ask': pa.float64(),
+    'change': pa.float64(), 'percentChange': pa.float64(), 'impliedVolatility': pa.float64(),
+    'volume': pa.float64(), 'openInterest': pa.float64(),
+    'Option_Type': _CATEGORY, 'Symbol': _CATEGORY, 'Data_Type': _CATEGORY,
+    'Expiry': pa.string(), 'Fetched_At': pa.timestamp('us'),
+}
+
+
+def _write_parquet(data: pd.DataFrame, filepath: str, index: bool, partition_cols: Optional[List[str]] = None):
+    """Write data as Snappy Parquet, moving constant metadata columns into the schema metadata."""
+    meta = {}
+    for column, key in METADATA_COLUMNS.items():
+        if column in data.columns and data[column].nunique(dropna=False) == 1:
+            value = data[column].iloc[0]
+            meta[key] = (value.isoformat() if isinstance(value, datetime) else str(value)).encode()
+    if meta:
+        dropped = [c for c, k in METADATA_COLUMNS.items() if k in meta]
+        meta[COLUMN_ORDER_KEY] = json.dumps(list(data.columns)).encode()
+        meta[CATEGORY_COLUMNS_KEY] = json.dumps(
+            [c for c in dropped if isinstance(data[c].dtype, pd.CategoricalDtype)]).encode()
+    table = pa.Table.from_pandas(data.drop(columns=[c for c, k in METADATA_COLUMNS.items() if k in meta]),
+                                 preserve_index=index)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **meta})
+    if partition_cols:
+        pq.write_to_dataset(table, filepath, partition_cols=partition_cols, compression='snappy')
+    else:
+        pq.write_table(table, filepath, compression='snappy')
+
+
+def _restore_metadata_columns(data: pd.DataFrame, meta: Dict[str, str],
+                              layout: Dict[str, List[str]]) -> pd.DataFrame:
+    """Turn the metadata from DataFetcher.load_with_meta back into constant columns, in their saved order."""
+    columns = {column: meta[column] for column in METADATA_COLUMNS if column in meta}
+    if 'Fetched_At' in columns:
+        columns['Fetched_At'] = pd.Timestamp(columns['Fetched_At'])
+    for column in layout.get('category_columns', []):
+        if column in columns:
+            columns[column] = _constant_category(columns[column], data.index)
+    data = data.assign(**columns)
+    # Partition columns (and any others not in the saved order) stay at the end
+    order = [c for c in layout.get('column_order', []) if c in data.columns]
+    return data[order + [c for c in data.columns if c not in order]] if order else data
+
+
+# Trailing UTC offset of an ISO 8601 timestamp ('Z', '+09:00', '-0400')
+_UTC_OFFSET_PATTERN = r'(?:Z|[+-]\d{2}:?\d{2})$'
+
+
+def _local_datetime_index(values: pd.Index) -> pd.Index:
+    """Parse ISO 8601 timestamps in the file's own UTC offset, or as wall-clock times if it varies."""
+    # Converting to UTC would move daily bars of exchanges ahead of UTC onto the previous day
+    values = values.astype(str)
+    offsets = values.str.extract(f'({_UTC_OFFSET_PATTERN})', expand=False)
+    if offsets.notna().all() and offsets.nunique() == 1:
+        return pd.to_datetime(values, format='ISO8601')
+    # Mixed offsets (e.g. across DST) or none at all: keep the exchange-local wall clock
+    return pd.to_datetime(values.str.replace(_UTC_OFFSET_PATTERN, '', regex=True), format='ISO8601')
+
+
+@lru_cache(maxsize=256)
+def _get_ticker(symbol: str) -> yf.Ticker:
+    """Return a shared yf.Ticker per symbol so its session and crumb are reused."""
+    return yf.Ticker(symbol)
+
+
+def _exchange_timezone(symbol: str) -> Optional[str]:
+    """Exchange timezone Ticker.history uses for symbol, or None if it cannot be found."""
+    ticker = _get_ticker(symbol)
+    try:
+        # Private, but served from yfinance's tz cache that the download just filled
+        return ticker._get_ticker_tz(timeout=10)
+    except (AttributeError, TypeError) as e:
+        # Its signature has changed between yfinance releases; fall back to the
+        # public history metadata (one small request) rather than refetching the symbol
+        logger.warning(f"yfinance tz cache lookup failed ({e}); using history_metadata for {symbol}")
+    except Exception as e:
+        logger.warning(f"Could not look up exchange timezone for {symbol}: {e}")
+        return None
+    try:
+        return ticker.history_metadata.get('exchangeTimezoneName')
+    except Exception as e:
+        logger.warning(f"Could not look up exchange timezone for {symbol}: {e}")
+        return None
+
 
 class DataFetcher:
     """Class to fetch and store historical data for stocks/ETFs and options."""
     
-    def __init__(self, data_dir: str = "data"):
+    FILE_FORMATS = ("csv", "parquet")
+    
+    def __init__(self,
+                 data_dir: str = "data",
+                 file_format: str = "csv",
+                 stock_cache_ttl: Optional[float] = None,
+                 options_cache_ttl: float = OPTIONS_CACHE_TTL):
         """
         Initialize the DataFetcher.
         
         Args:
-            data_dir: Directory to store CSV files
+            data_dir: Directory to store data files
+            file_format: File format for saved data ('csv' or 'parquet')
+            stock_cache_ttl: Seconds to reuse cached stock responses (default: 1 day
+                for daily or longer intervals, 5 minutes for intraday; 0 disables)
+            options_cache_ttl: Seconds to reuse cached options responses (0 disables)
         """
+        if file_format not in self.FILE_FORMATS:
+            raise ValueError(f"Unsupported file format: {file_format} (expected one of {self.FILE_FORMATS})")
         self.data_dir = data_dir
+        self.file_format = file_format
         self.stocks_dir = os.path.join(data_dir, "stocks")
         self.options_dir = os.path.join(data_dir, "options")
+        self.cache_dir = os.path.join(data_dir, ".cache")
+        self.stock_cache_ttl = stock_cache_ttl
+        self.options_cache_ttl = options_cache_ttl
+        self._file_index = None
         self._ensure_data_dirs()
     
     def _ensure_data_dirs(self):
         """Create data directories if they don't exist."""
-        for directory in [self.data_dir, self.stocks_dir, self.options_dir]:
-            if not os.path.exists(directory):
+        # makedirs creates data_dir along the way; FileExistsError replaces the
+        # racy exists() check and keeps the log to directories actually created
+        for directory in (self.stocks_dir, self.options_dir):
+            try:
                 os.makedirs(directory)
                 logger.info(f"Created directory: {directory}")
+            except FileExistsError:
+                pass
+    
+    def _cache_base(self, kind: str, *key: str) -> str:
+        """Path prefix of a cache entry: <cache_dir>/<kind>/<md5 of key>."""
+        digest = hashlib.md5("|".join(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, kind, digest)
+    
+    def _cache_get(self, kind: str, key: Tuple[str, ...], ttl: float) -> Optional[Dict[str, pd.DataFrame]]:
+        """Return the cached frames for key if they are younger than ttl, else None."""
+        if not ttl:
+            return None
+        base = self._cache_base(kind, *key)
+        try:
+            with open(base + ".json") as f:
+                meta = json.load(f)
+            if time.time() - meta['fetched_at'] >= ttl:
+                return None
+            return {name: pd.read_parquet(os.path.join(base, f"{name}.parquet"), engine='pyarrow')
+                    for name in meta['frames']}
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache entry {base}: {e}")
+            return None
+    
+    def _cache_put(self, kind: str, key: Tuple[str, ...], ttl: float, frames: Dict[str, pd.DataFrame]):
+        """Store frames under key with a sidecar JSON holding fetch time and TTL."""
+        if not ttl:
+            return
+        base = self._cache_base(kind, *key)
+        try:
+            os.makedirs(base, exist_ok=True)
+            for name, frame in frames.items():
+                frame.to_parquet(os.path.join(base, f"{name}.parquet"), engine='pyarrow', compression='snappy')
+            # Write the sidecar last so a partial entry is never treated as valid
+            tmp_path = base + ".json.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({'fetched_at': time.time(), 'ttl': ttl, 'frames': list(frames)}, f)
+            os.replace(tmp_path, base + ".json")
+        except Exception as e:
+            logger.warning(f"Could not cache {kind} data in {base}: {e}")
     
     def fetch_stock_data(self, 
                         symbol: str, 
@@ -52,29 +263,144 @@ class DataFetcher:
         Returns:
             DataFrame with historical data
         """
+        ttl = self._stock_cache_ttl(interval)
+        cache_key = (symbol, period, interval)
+        cached = self._cache_get("stocks", cache_key, ttl)
+        if cached is not None:
+            logger.info(f"Using cached stock data for {symbol} (period: {period}, interval: {interval})")
+            return cached['stock']
+        
         try:
             logger.info(f"Fetching stock data for {symbol} (period: {period}, interval: {interval})")
-            ticker = yf.Ticker(symbol)
+            ticker = _get_ticker(symbol)
             data = ticker.history(period=period, interval=interval)
             
             if data.empty:
                 logger.warning(f"No stock data found for {symbol}")
                 return pd.DataFrame()
             
-            # Add metadata
-            data['Symbol'] = symbol
-            data['Fetched_At'] = datetime.now()
-            data['Data_Type'] = 'stock'
-            data['Period'] = period
-            data['Interval'] = interval
+            data = self._add_stock_metadata(data, symbol, period, interval)
             
             logger.info(f"Successfully fetched {len(data)} stock records for {symbol}")
+            self._cache_put("stocks", cache_key, ttl, {'stock': data})
             return data
             
         except Exception as e:
             logger.error(f"Error fetching stock data for {symbol}: {e}")
             return pd.DataFrame()
     
+    def fetch_stock_data_batch(self,
+                               symbols: List[str],
+                               period: str = "2y",
+                               interval: str = "1d") -> Dict[str, pd.DataFrame]:
+        """
+        Fetch historical stock/ETF data for several symbols in one yf.download request.
+        
+        Args:
+            symbols: Stock/ETF symbols (Yahoo accepts about 20 per request)
+            period: Data period
+            interval: Data interval
+        
+        Returns:
+            Dictionary with symbols as keys and DataFrames as values (empty if no data)
+        """
+        ttl = self._stock_cache_ttl(interval)
+        results = {}
+        missing = []
+        for symbol in symbols:
+            cached = self._cache_get("stocks", (symbol, period, interval), ttl)
+            if cached is not None:
+                logger.info(f"Using cached stock data for {symbol} (period: {period}, interval: {interval})")
+                results[symbol] = cached['stock']
+            else:
+                missing.append(symbol)
+        
+        if missing:
+            try:
+                logger.info(f"Fetching stock data for {', '.join(missing)} (period: {period}, interval: {interval})")
+                # actions=True keeps Dividends/Stock Splits, matching Ticker.history
+                # ignore_tz=False returns a UTC index; each symbol is converted back to its exchange time below
+                batch = yf.download(' '.join(missing), period=period, interval=interval, group_by='ticker',
+                                    actions=True, auto_adjust=True, ignore_tz=False, threads=True, progress=False)
+            except Exception as e:
+                logger.error(f"Error fetching stock data for {', '.join(missing)}: {e}")
+                batch = None
+            
+            for symbol in missing:
+                data = pd.DataFrame()
+                if batch is not None and not batch.empty:
+                    if isinstance(batch.columns, pd.MultiIndex):
+                        if symbol in batch.columns.get_level_values(0):
+                            # The batch index is the union of all dates; drop other symbols' rows
+                            data = batch[symbol].dropna(subset=['Close'])
+                    elif len(missing) == 1:
+                        data = batch.dropna(subset=['Close'])
+                
+                if data.empty:
+                    logger.warning(f"No stock data found for {symbol}")
+                    results[symbol] = pd.DataFrame()
+                    continue
+                
+                empty_actions = [c for c in ACTION_COLUMNS if c in data.columns and data[c].isna().all()]
+                data = data.drop(columns=empty_actions)
+                
+                if data.index.tz is not None:
+                    tz = _exchange_timezone(symbol)
+                    if tz is None:
+                        # Without the exchange timezone the index would differ from fetch_stock_data's
+                        logger.warning(f"No exchange timezone for {symbol}; fetching it on its own")
+                        results[symbol] = self.fetch_stock_data(symbol, period, interval)
+                        continue
+                    data = data.tz_convert(tz)
+                
+                data = self._add_stock_metadata(data.rename_axis(columns=None), symbol, period, interval)
+                logger.info(f"Successfully fetched {len(data)} stock records for {symbol}")
+                self._cache_put("stocks", (symbol, period, interval), ttl, {'stock': data})
+                results[symbol] = data
+        
+        return {symbol: results[symbol] for symbol in symbols}
+    
+    def _stock_cache_ttl(self, interval: str) -> float:
+        """Cache lifetime for stock data at the given interval."""
+        if self.stock_cache_ttl is not None:
+            return self.stock_cache_ttl
+        return DAILY_STOCK_CACHE_TTL if interval in DAILY_INTERVALS else INTRADAY_STOCK_CACHE_TTL
+    
+    def _add_stock_metadata(self, data: pd.DataFrame, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        """Add the symbol/fetch metadata columns to stock data."""
+        return data.assign(Symbol=_constant_category(symbol, data.index),
+                           Fetched_At=datetime.now(),
+                           Data_Type=_constant_category('stock', data.index),
+                           Period=period,
+                           Interval=interval)
+    
+    def _fetch_one_expiry(self, ticker: yf.Ticker, symbol: str, expiry: str,
+                          fetched_at: datetime) -> Optional[Tuple[str, pd.DataFrame, pd.DataFrame]]:
+        """Fetch one expiry's chain as (expiry, calls, puts), or None if it fails."""
+        try:
+            logger.info(f"Fetching options chain for {symbol} expiry: {expiry}")
+            with _options_request_slots:
+                chain = ticker.option_chain(expiry)
+            
+            # Add metadata in one assign per side
+            calls = chain.calls.assign(Option_Type=_constant_category('call', chain.calls.index),
+                                       Symbol=_constant_category(symbol, chain.calls.index),
+                                       Expiry=expiry,
+                                       Fetched_At=fetched_at,
+                                       Data_Type=_constant_category('options', chain.calls.index))
+            puts = chain.puts.assign(Option_Type=_constant_category('put', chain.puts.index),
+                                     Symbol=_constant_category(symbol, chain.puts.index),
+                                     Expiry=expiry,
+                                     Fetched_At=fetched_at,
+                                     Data_Type=_constant_category('options', chain.puts.index))
+            
+            logger.info(f"Fetched {len(calls)} calls and {len(puts)} puts for {symbol} {expiry}")
+            return expiry, calls, puts
+            
+        except Exception as e:
+            logger.error(f"Error fetching options for {symbol} {expiry}: {e}")
+            return None
+    
     def fetch_options_data(self, symbol: str) -> Dict[str, pd.DataFrame]:
         """
         Fetch options data for a symbol.
@@ -85,49 +411,41 @@ class DataFetcher:
         Returns:
             Dictionary with expirations as keys and option chains as values
         """
+        cached = self._cache_get("options", (symbol,), self.options_cache_ttl)
+        if cached is not None:
+            logger.info(f"Using cached options data for {symbol}")
+            return cached
+        
         try:
             logger.info(f"Fetching options data for {symbol}")
-            ticker = yf.Ticker(symbol)
+            ticker = _get_ticker(symbol)
             
             # Get available expirations
-            expirations = ticker.options
+            with _options_request_slots:
+                expirations = ticker.options
             if not expirations:
                 logger.warning(f"No options data found for {symbol}")
                 return {}
             
+            # One HTTP request per expiry; run them concurrently on the shared Ticker.
+            # map() yields results in expiration order.
             options_data = {}
-            for expiry in expirations:
-                try:
-                    logger.info(f"Fetching options chain for {symbol} expiry: {expiry}")
-                    chain = ticker.option_chain(expiry)
-                    
-                    # Process calls
-                    calls = chain.calls.copy()
-                    calls['Option_Type'] = 'call'
-                    calls['Symbol'] = symbol
-                    calls['Expiry'] = expiry
-                    calls['Fetched_At'] = datetime.now()
-                    calls['Data_Type'] = 'options'
-                    
-                    # Process puts
-                    puts = chain.puts.copy()
-                    puts['Option_Type'] = 'put'
-                    puts['Symbol'] = symbol
-                    puts['Expiry'] = expiry
-                    puts['Fetched_At'] = datetime.now()
-                    puts['Data_Type'] = 'options'
+            fetched_at = datetime.now()
+            with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_OPTIONS_REQUESTS, len(expirations))) as executor:
+                chains = executor.map(lambda expiry: self._fetch_one_expiry(ticker, symbol, expiry, fetched_at),
+                                      expirations)
+                for chain in chains:
+                    if chain is None:
+                        continue
+                    expiry, calls, puts = chain
                     
                     # Store separately
                     options_data[f"{expiry}_calls"] = calls
                     options_data[f"{expiry}_puts"] = puts
-                    
-                    logger.info(f"Fetched {len(calls)} calls and {len(puts)} puts for {symbol} {expiry}")
-                    
-                except Exception as e:
-                    logger.error(f"Error fetching options for {symbol} {expiry}: {e}")
-                    continue
             
             logger.info(f"Successfully fetched options data for {symbol} with {len(options_data)} option chains")
+            if options_data:
+                self._cache_put("options", (symbol,), self.options_cache_ttl, options_data)
             return options_data
             
         except Exception as e:
@@ -136,7 +454,7 @@ class DataFetcher:
     
     def save_stock_data(self, data: pd.DataFrame, symbol: str, period: str, interval: str = "1d") -> str:
         """
-        Save stock data to CSV file with descriptive filename.
+        Save stock data to a CSV or Parquet file with descriptive filename.
         
         Args:
             data: DataFrame to save
@@ -152,12 +470,17 @@ class DataFetcher:
             return ""
         
         # Create descriptive filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"stock_data_{symbol}_{period}_{interval}_{timestamp}.csv"
+        timestamp = _file_timestamp()
+        filename = f"stock_data_{symbol}_{period}_{interval}_{timestamp}.{self.file_format}"
         filepath = os.path.join(self.stocks_dir, filename)
         
+        self._file_index = None
         try:
-            data.to_csv(filepath)
+            if self.file_format == "parquet":
+                # Keep the DatetimeIndex; Parquet stores it with its dtype
+                _write_parquet(data, filepath, index=True)
+            else:
+                data.to_csv(filepath)
             logger.info(f"Stock data saved to: {filepath}")
             return filepath
         except Exception as e:
@@ -166,21 +489,27 @@ class DataFetcher:
     
     def save_options_data(self, options_data: Dict[str, pd.DataFrame], symbol: str) -> List[str]:
         """
-        Save options data to separate CSV files with descriptive filenames.
+        Save options data to separate CSV files with descriptive filenames, or, for
+        Parquet, to one dataset partitioned by Expiry and Option_Type.
         
         Args:
             options_data: Dictionary with option chains as keys and DataFrames as values
             symbol: Stock/ETF symbol
         
         Returns:
-            List of paths to saved files
+            List of paths to saved files (a single dataset directory for Parquet)
         """
         if not options_data:
             logger.warning(f"No options data to save for {symbol}")
             return []
         
         saved_files = []
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = _file_timestamp()
+        self._file_index = None
+        
+        if self.file_format == "parquet":
+            filepath = self._save_options_dataset(options_data, symbol, timestamp)
+            return [filepath] if filepath else []
         
         for key, data in options_data.items():
             if data.empty:
@@ -189,7 +518,7 @@ class DataFetcher:
             # Create descriptive filename
             # key format: "YYYY-MM-DD_calls" or "YYYY-MM-DD_puts"
             expiry_clean = key.replace('-', '').replace('_', '_')
-            filename = f"options_data_{symbol}_{expiry_clean}_{timestamp}.csv"
+            filename = f"options_data_{symbol}_{expiry_clean}_{timestamp}.{self.file_format}"
             filepath = os.path.join(self.options_dir, filename)
             
             try:
@@ -201,48 +530,117 @@ class DataFetcher:
         
         return saved_files
     
+    def _save_options_dataset(self, options_data: Dict[str, pd.DataFrame], symbol: str, timestamp: str) -> str:
+        """Write all chains as one Parquet dataset partitioned by Expiry and Option_Type."""
+        frames = []
+        for key, data in options_data.items():
+            if data.empty:
+                continue
+            # key format: "YYYY-MM-DD_calls" or "YYYY-MM-DD_puts"; the fetched
+            # frames already carry these columns, fill them in for hand-built ones
+            expiry, side = key.rsplit('_', 1)
+            if 'Expiry' not in data.columns:
+                data = data.assign(Expiry=expiry)
+            if 'Option_Type' not in data.columns:
+                data = data.assign(Option_Type=side.rstrip('s'))
+            frames.append(data)
+        if not frames:
+            return ""
+        
+        filepath = os.path.join(self.options_dir, f"options_data_{symbol}_{timestamp}.parquet")
+        try:
+            _write_parquet(pd.concat(frames, ignore_index=True), filepath, index=False,
+                           partition_cols=['Expiry', 'Option_Type'])
+            logger.info(f"Options data saved to: {filepath}")
+            return filepath
+        except Exception as e:
+            logger.error(f"Error saving options data for {symbol}: {e}")
+            return ""
+    
     def load_stock_data(self, filepath: str) -> pd.DataFrame:
         """
-        Load stock data from CSV file.
+        Load stock data from a CSV or Parquet file.
         
         Args:
-            filepath: Path to CSV file
+            filepath: Path to CSV or Parquet file
         
         Returns:
             DataFrame with loaded data
         """
         try:
-            data = pd.read_csv(filepath, index_col=0, parse_dates=True)
+            if filepath.endswith('.parquet'):
+                data = _restore_metadata_columns(*self._read_parquet(filepath))
+            else:
+                data = pd.read_csv(filepath, index_col=0)
+                # Yahoo dates are ISO 8601 with a UTC offset that changes with DST; the
+                # fixed ISO parser is much faster than parse_dates' format guessing
+                try:
+                    data.index = _local_datetime_index(data.index)
+                except (ValueError, TypeError):
+                    pass  # not a date index; keep it as read, like parse_dates=True did
             logger.info(f"Stock data loaded from: {filepath}")
             return data
         except Exception as e:
             logger.error(f"Error loading stock data from {filepath}: {e}")
             return pd.DataFrame()
     
-    def load_options_data(self, filepath: str) -> pd.DataFrame:
+    def load_options_data(self, filepath: str, expiry: Optional[str] = None) -> pd.DataFrame:
         """
-        Load options data from CSV file.
+        Load options data from a CSV file or a Parquet file/dataset.
         
         Args:
-            filepath: Path to CSV file
+            filepath: Path to CSV file or Parquet file/dataset directory
+            expiry: Only read this expiry (YYYY-MM-DD) from a partitioned Parquet dataset
         
         Returns:
             DataFrame with loaded data
         """
         try:
-            data = pd.read_csv(filepath, parse_dates=['Fetched_At'])
+            if filepath.endswith('.parquet'):
+                data = _restore_metadata_columns(*self._read_parquet(filepath, expiry))
+            else:
+                convert_options = pa_csv.ConvertOptions(column_types=OPTIONS_CSV_COLUMN_TYPES)
+                data = pa_csv.read_csv(filepath, convert_options=convert_options).to_pandas()
             logger.info(f"Options data loaded from: {filepath}")
             return data
         except Exception as e:
             logger.error(f"Error loading options data from {filepath}: {e}")
             return pd.DataFrame()
     
+    def load_with_meta(self, filepath: str, expiry: Optional[str] = None) -> Tuple[pd.DataFrame, Dict[str, str]]:
+        """
+        Load a Parquet file or options dataset without expanding its metadata.
+        
+        Args:
+            filepath: Path to Parquet file or dataset directory
+            expiry: Only read this expiry (YYYY-MM-DD) from a partitioned options dataset
+        
+        Returns:
+            Tuple of (DataFrame, dict of metadata such as Symbol and Fetched_At)
+        """
+        data, meta, _ = self._read_parquet(filepath, expiry)
+        return data, meta
+    
+    def _read_parquet(self, filepath: str,
+                      expiry: Optional[str] = None) -> Tuple[pd.DataFrame, Dict[str, str], Dict[str, List[str]]]:
+        """Read a Parquet file or dataset as (data, metadata, saved column layout)."""
+        # A filter on the partition column skips the other expiries' files
+        filters = [('Expiry', '=', expiry)] if expiry and os.path.isdir(filepath) else None
+        # Memory-map the file(s) and hand the Arrow buffers to pandas without a
+        # consolidation copy; self_destruct frees each column as it is converted
+        table = pq.read_table(filepath, filters=filters, memory_map=True, use_threads=True)
+        schema_meta = table.schema.metadata or {}
+        meta = {column: schema_meta[key].decode() for column, key in METADATA_COLUMNS.items() if key in schema_meta}
+        layout = {key.decode(): json.loads(schema_meta[key])
+                  for key in (COLUMN_ORDER_KEY, CATEGORY_COLUMNS_KEY) if key in schema_meta}
+        return table.to_pandas(split_blocks=True, self_destruct=True), meta, layout
+    
     def fetch_and_save_all(self, 
                           symbol: str, 
                           period: str = "2y", 
                           interval: str = "1d") -> Tuple[str, List[str]]:
         """
-        Fetch both stock and options data and save to separate CSV files.
+        Fetch both stock and options data and save to separate files.
         
         Args:
             symbol: Stock/ETF symbol
@@ -262,32 +660,55 @@ class DataFetcher:
         
         return stock_file, options_files
     
+    def _save_symbol(self, symbol: str, stock_data: pd.DataFrame, period: str, interval: str) -> Dict[str, any]:
+        """Save one symbol's stock data, fetch and save its options, and summarize the files."""
+        logger.info(f"Processing {symbol}...")
+        stock_file = self.save_stock_data(stock_data, symbol, period, interval) if not stock_data.empty else ""
+        options_data = self.fetch_options_data(symbol)
+        options_files = self.save_options_data(options_data, symbol) if options_data else []
+        # Count rows from the frames already in memory instead of re-reading the files
+        return {
+            'stock_file': stock_file,
+            'options_files': options_files,
+            'stock_records': len(stock_data) if stock_file else 0,
+            'options_records': sum(len(df) for df in options_data.values()) if options_files else 0
+        }
+    
     def fetch_multiple_symbols(self, 
                               symbols: List[str], 
                               period: str = "2y", 
-                              interval: str = "1d") -> Dict[str, Dict[str, any]]:
+                              interval: str = "1d",
+                              threads: Optional[int] = None) -> Dict[str, Dict[str, any]]:
         """
         Fetch data for multiple symbols.
         
+        Stock data is downloaded in batches of STOCK_BATCH_SIZE symbols per request;
+        options chains (which Yahoo does not batch) are fetched concurrently.
+        
         Args:
             symbols: List of stock/ETF symbols
             period: Data period
             interval: Data interval
+            threads: Number of worker threads (default: one per symbol, up to 32)
         
         Returns:
-            Dictionary with results for each symbol
+            Dictionary with results for each symbol, in the order given
         """
+        if not symbols:
+            return {}
+        
+        stock_data = {}
+        for start in range(0, len(symbols), STOCK_BATCH_SIZE):
+            stock_data.update(self.fetch_stock_data_batch(symbols[start:start + STOCK_BATCH_SIZE], period, interval))
+        
+        # The options work is network-bound, so threads overlap the Yahoo round-trips
         results = {}
-        for symbol in symbols:
-            logger.info(f"Processing {symbol}...")
-            stock_file, options_files = self.fetch_and_save_all(symbol, period, interval)
-            results[symbol] = {
-                'stock_file': stock_file,
-                'options_files': options_files,
-                'stock_records': len(self.load_stock_data(stock_file)) if stock_file else 0,
-                'options_records': sum(len(self.load_options_data(f)) for f in options_files)
-            }
-        return results
+        with ThreadPoolExecutor(max_workers=threads or min(32, len(symbols))) as executor:
+            futures = {executor.submit(self._save_symbol, symbol, stock_data[symbol], period, interval): symbol
+                       for symbol in dict.fromkeys(symbols)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        return {symbol: results[symbol] for symbol in symbols}
     
     def get_latest_files(self, symbol: str) -> Dict[str, str]:
         """
@@ -300,23 +721,14 @@ class DataFetcher:
             Dictionary with 'stock' and 'options' keys
         """
         try:
-            # Get latest stock file
-            stock_files = [f for f in os.listdir(self.stocks_dir) if f.startswith(f"stock_data_{symbol}_")]
-            stock_file = None
-            if stock_files:
-                stock_files.sort(reverse=True)
-                stock_file = os.path.join(self.stocks_dir, stock_files[0])
-            
-            # Get latest options files
-            options_files = [f for f in os.listdir(self.options_dir) if f.startswith(f"options_data_{symbol}_")]
-            options_file = None
-            if options_files:
-                options_files.sort(reverse=True)
-                options_file = os.path.join(self.options_dir, options_files[0])
+            # glob does the prefix match in one directory read; pick the largest name as
+            # before (names embed the fetch timestamp, mtimes change on copy/checkout)
+            stock_files = glob.glob(os.path.join(self.stocks_dir, f"stock_data_{glob.escape(symbol)}_*"))
+            options_files = glob.glob(os.path.join(self.options_dir, f"options_data_{glob.escape(symbol)}_*"))
             
             return {
-                'stock': stock_file,
-                'options': options_file
+                'stock': max(stock_files) if stock_files else None,
+                'options': max(options_files) if options_files else None
             }
         except Exception as e:
             logger.error(f"Error finding latest files for {symbol}: {e}")
@@ -330,34 +742,37 @@ class DataFetcher:
             Dictionary with symbols as keys and file lists as values
         """
         try:
-            available_data = {}
-            
-            # Get stock files
-            stock_files = [f for f in os.listdir(self.stocks_dir) if f.endswith('.csv')]
-            for file in stock_files:
-                # Parse filename: stock_data_SYMBOL_PERIOD_INTERVAL_TIMESTAMP.csv
-                parts = file.replace('.csv', '').split('_')
-                if len(parts) >= 4:
-                    symbol = parts[2]
-                    if symbol not in available_data:
-                        available_data[symbol] = {'stocks': [], 'options': []}
-                    available_data[symbol]['stocks'].append(file)
-            
-            # Get options files
-            options_files = [f for f in os.listdir(self.options_dir) if f.endswith('.csv')]
-            for file in options_files:
-                # Parse filename: options_data_SYMBOL_EXPIRY_TYPE_TIMESTAMP.csv
-                parts = file.replace('.csv', '').split('_')
-                if len(parts) >= 5:
-                    symbol = parts[2]
-                    if symbol not in available_data:
-                        available_data[symbol] = {'stocks': [], 'options': []}
-                    available_data[symbol]['options'].append(file)
-            
-            return available_data
+            # Reuse the index until a save or a directory mtime change invalidates it
+            dir_mtimes = (os.stat(self.stocks_dir).st_mtime_ns, os.stat(self.options_dir).st_mtime_ns)
+            if self._file_index is None or self._file_index[0] != dir_mtimes:
+                self._file_index = (dir_mtimes, self._scan_data_files())
+            return {symbol: {kind: list(files) for kind, files in groups.items()}
+                    for symbol, groups in self._file_index[1].items()}
         except Exception as e:
             logger.error(f"Error listing available data: {e}")
             return {}
+    
+    def _scan_data_files(self) -> Dict[str, Dict[str, List[str]]]:
+        """Group the data files by symbol in one scandir pass per directory."""
+        available_data = {}
+        
+        # (directory, key, minimum filename parts)
+        # stock_data_SYMBOL_PERIOD_INTERVAL_TIMESTAMP.{csv,parquet}
+        # options_data_SYMBOL_EXPIRY_TYPE_TIMESTAMP.csv or options_data_SYMBOL_TIMESTAMP.parquet/
+        for directory, kind, min_parts in ((self.stocks_dir, 'stocks', 4), (self.options_dir, 'options', 5)):
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    # Parquet options datasets are directories named like files
+                    if not entry.name.endswith(DATA_FILE_EXTENSIONS):
+                        continue
+                    if not (entry.is_file() or (entry.name.endswith('.parquet') and entry.is_dir())):
+                        continue
+                    parts = os.path.splitext(entry.name)[0].split('_')
+                    if len(parts) >= min_parts:
+                        groups = available_data.setdefault(parts[2], {'stocks': [], 'options': []})
+                        groups[kind].append(entry.name)
+        
+        return available_data
 
 
 def main():
@@ -369,26 +784,28 @@ def main():
     parser.add_argument("--period", default="2y", help="Data period (default: 2y)")
     parser.add_argument("--interval", default="1d", help="Data interval (default: 1d)")
     parser.add_argument("--data-dir", default="data", help="Data directory (default: data)")
+    parser.add_argument("--format", default="csv", choices=DataFetcher.FILE_FORMATS, help="File format for saved data (default: csv)")
     parser.add_argument("--stocks-only", action="store_true", help="Fetch only stock data, skip options")
     parser.add_argument("--options-only", action="store_true", help="Fetch only options data, skip stocks")
     parser.add_argument("--list", action="store_true", help="List available data files")
     
     args = parser.parse_args()
     
-    fetcher = DataFetcher(args.data_dir)
+    fetcher = DataFetcher(args.data_dir, args.format)
     
     if args.list:
         # List available data
         available = fetcher.list_available_data()
-        print("\nAvailable data files:")
+        # Build the listing in memory and write it once
+        buf = io.StringIO()
+        buf.write("\nAvailable data files:\n")
         for symbol, files in available.items():
-            print(f"\n{symbol}:")
-            print(f"  Stock files: {len(files['stocks'])}")
-            for f in sorted(files['stocks']):
-                print(f"    {f}")
-            print(f"  Options files: {len(files['options'])}")
-            for f in sorted(files['options']):
-                print(f"    {f}")
+            buf.write(f"\n{symbol}:\n")
+            buf.write(f"  Stock files: {len(files['stocks'])}\n")
+            buf.writelines(f"    {f}\n" for f in sorted(files['stocks']))
+            buf.write(f"  Options files: {len(files['options'])}\n")
+            buf.writelines(f"    {f}\n" for f in sorted(files['options']))
+        sys.stdout.write(buf.getvalue())
         return
     
     if args.stocks_only:
@@ -411,13 +828,14 @@ def main():
         # Fetch both stock and options data
         results = fetcher.fetch_multiple_symbols(args.symbols, args.period, args.interval)
         
-        print(f"\nFetched data for {len(results)} symbols:")
+        buf = io.StringIO()
+        buf.write(f"\nFetched data for {len(results)} symbols:\n")
         for symbol, result in results.items():
-            print(f"\n{symbol}:")
-            print(f"  Stock: {result['stock_file']} ({result['stock_records']} records)")
-            print(f"  Options: {len(result['options_files'])} files ({result['options_records']} records)")
-            for f in result['options_files']:
-                print(f"    {f}")
+            buf.write(f"\n{symbol}:\n")
+            buf.write(f"  Stock: {result['stock_file']} ({result['stock_records']} records)\n")
+            buf.write(f"  Options: {len(result['options_files'])} files ({result['options_records']} records)\n")
+            buf.writelines(f"    {f}\n" for f in result['options_files'])
+        sys.stdout.write(buf.getvalue())
 
 
 if __name__ == "__main__":
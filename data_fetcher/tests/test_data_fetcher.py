@@ -5,12 +5,17 @@ Tests for the data fetcher module.
 import unittest
 import os
 import sys
+import threading
+import time
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from unittest.mock import MagicMock, patch
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+import data_fetcher
 from data_fetcher import DataFetcher
 
 
@@ -80,6 +85,98 @@ class TestDataFetcher(unittest.TestCase):
         self.assertFalse(loaded_data.empty)
         self.assertEqual(len(loaded_data), 2)
     
+    def test_load_stock_data_keeps_exchange_offset(self):
+        """Test that CSV dates from an exchange ahead of UTC stay on their own day."""
+        test_data = pd.DataFrame({'Close': [101.0, 102.0]},
+                                 index=pd.DatetimeIndex(['2023-09-06', '2023-09-07'], tz='Asia/Tokyo', name='Date'))
+        
+        filepath = self.fetcher.save_stock_data(test_data, "7203.T", "5d", "1d")
+        loaded_data = self.fetcher.load_stock_data(filepath)
+        
+        self.assertEqual(loaded_data.index[0], pd.Timestamp('2023-09-06', tz='Asia/Tokyo'))
+        self.assertEqual(loaded_data.index[0].strftime('%Y-%m-%d'), '2023-09-06')
+    
+    def test_csv_and_parquet_stock_loads_match(self):
+        """Test that the CSV and Parquet copies of one fetch load with the same local dates."""
+        history = pd.DataFrame({'Close': [101.0, 102.0]},
+                               index=pd.DatetimeIndex(['2023-09-06', '2023-09-07'], tz='America/New_York', name='Date'))
+        test_data = self.fetcher._add_stock_metadata(history, "TEST", "5d", "1d")
+        parquet_fetcher = DataFetcher(self.test_data_dir, file_format="parquet")
+        
+        csv_data = self.fetcher.load_stock_data(self.fetcher.save_stock_data(test_data, "TEST", "5d", "1d"))
+        parquet_data = parquet_fetcher.load_stock_data(parquet_fetcher.save_stock_data(test_data, "TEST", "5d", "1d"))
+        
+        self.assertEqual(list(csv_data.index), list(parquet_data.index))
+        self.assertEqual(list(csv_data.index.strftime('%Y-%m-%d %H:%M')), list(parquet_data.index.strftime('%Y-%m-%d %H:%M')))
+        self.assertEqual(list(csv_data['Close']), list(parquet_data['Close']))
+    
+    def test_save_and_load_stock_data_parquet(self):
+        """Test saving and loading stock data as Parquet."""
+        fetcher = DataFetcher(self.test_data_dir, file_format="parquet")
+        test_data = pd.DataFrame({
+            'Open': [100.0, 101.0],
+            'Close': [101.0, 102.0],
+            'Volume': [1000, 1100],
+            'Symbol': ['TEST', 'TEST']
+        }, index=pd.DatetimeIndex(['2024-01-02', '2024-01-03'], name='Date'))
+        
+        filepath = fetcher.save_stock_data(test_data, "TEST", "5d", "1d")
+        self.assertTrue(filepath.endswith('.parquet'))
+        
+        loaded_data = fetcher.load_stock_data(filepath)
+        pd.testing.assert_frame_equal(loaded_data, test_data)
+        self.assertIn('TEST', fetcher.list_available_data())
+        
+        # The constant Symbol column is stored once, as file metadata
+        bare_data, meta = fetcher.load_with_meta(filepath)
+        self.assertNotIn('Symbol', bare_data.columns)
+        self.assertEqual(meta, {'Symbol': 'TEST'})
+    
+    def test_parquet_round_trip_keeps_fetched_layout(self):
+        """Test that a fetched-shape frame keeps its column order and categoricals through Parquet."""
+        fetcher = DataFetcher(self.test_data_dir, file_format="parquet")
+        history = pd.DataFrame({'Open': [100.0, 101.0], 'Close': [101.0, 102.0]},
+                               index=pd.DatetimeIndex(['2024-01-02', '2024-01-03'], tz='America/New_York', name='Date'))
+        test_data = fetcher._add_stock_metadata(history, "TEST", "5d", "1d")
+        
+        filepath = fetcher.save_stock_data(test_data, "TEST", "5d", "1d")
+        loaded_data = fetcher.load_stock_data(filepath)
+        
+        pd.testing.assert_frame_equal(loaded_data, test_data)
+        self.assertEqual(loaded_data['Symbol'].dtype, 'category')
+    
+    def test_save_and_load_options_dataset_parquet(self):
+        """Test that Parquet options are saved as one dataset readable per expiry."""
+        fetcher = DataFetcher(self.test_data_dir, file_format="parquet")
+        test_options = {
+            f"{expiry}_{side}": pd.DataFrame({'strike': [100.0, 105.0], 'lastPrice': [5.0, 3.0]})
+            for expiry in ("2024-01-19", "2024-02-16") for side in ("calls", "puts")
+        }
+        
+        filepaths = fetcher.save_options_data(test_options, "TEST")
+        self.assertEqual(len(filepaths), 1)
+        self.assertTrue(os.path.isdir(filepaths[0]))
+        
+        self.assertEqual(len(fetcher.load_options_data(filepaths[0])), 8)
+        january = fetcher.load_options_data(filepaths[0], expiry="2024-01-19")
+        self.assertEqual(len(january), 4)
+        self.assertEqual(set(january['Option_Type']), {'call', 'put'})
+        self.assertEqual(len(fetcher.list_available_data()['TEST']['options']), 1)
+    
+    def test_invalid_file_format(self):
+        """Test that an unknown file format is rejected."""
+        with self.assertRaises(ValueError):
+            DataFetcher(self.test_data_dir, file_format="xlsx")
+    
+    def test_saves_in_same_second_do_not_collide(self):
+        """Test that back-to-back saves get distinct, increasing filenames."""
+        test_data = pd.DataFrame({'Close': [101.0]})
+        first = self.fetcher.save_stock_data(test_data, "TEST", "5d", "1d")
+        second = self.fetcher.save_stock_data(test_data, "TEST", "5d", "1d")
+        
+        self.assertLess(first, second)
+        self.assertEqual(self.fetcher.get_latest_files("TEST")['stock'], second)
+    
     def test_save_and_load_options_data(self):
         """Test saving and loading options data."""
         # Create test options data
@@ -122,6 +219,116 @@ class TestDataFetcher(unittest.TestCase):
                 self.assertTrue(os.path.exists(file))
                 self.assertIn("options_data_SPY", file)
     
+    def test_options_requests_share_one_concurrency_cap(self):
+        """Test that nested symbol/expiry pools never exceed the shared request cap."""
+        lock = threading.Lock()
+        in_flight = [0, 0]  # current, peak
+        
+        def option_chain(expiry):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+            chain = pd.DataFrame({'strike': [100.0], 'lastPrice': [1.0]})
+            return MagicMock(calls=chain, puts=chain.copy())
+        
+        ticker = MagicMock(options=[f"2024-01-{day:02d}" for day in range(1, 11)])
+        ticker.option_chain.side_effect = option_chain
+        fetcher = DataFetcher(self.test_data_dir, options_cache_ttl=0)
+        
+        with patch('data_fetcher._get_ticker', return_value=ticker), \
+                patch('data_fetcher._options_request_slots', threading.BoundedSemaphore(3)):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(fetcher.fetch_options_data, [f"S{i}" for i in range(8)]))
+        
+        self.assertTrue(all(len(result) == 20 for result in results))
+        self.assertLessEqual(in_flight[1], 3)
+    
+    def test_fetch_multiple_symbols_keeps_order(self):
+        """Test that concurrent fetches return results in the requested order."""
+        symbols = ["AAA", "BBB", "CCC"]
+        batch = {symbol: pd.DataFrame() for symbol in symbols}
+        with patch.object(self.fetcher, 'fetch_stock_data_batch', return_value=batch) as mock_batch, \
+                patch.object(self.fetcher, 'fetch_options_data', return_value={}) as mock_options:
+            results = self.fetcher.fetch_multiple_symbols(symbols, "5d", "1d", threads=2)
+        
+        self.assertEqual(list(results), symbols)
+        mock_batch.assert_called_once_with(symbols, "5d", "1d")
+        self.assertEqual(mock_options.call_count, 3)
+        self.assertEqual(results["BBB"]['stock_records'], 0)
+    
+    def test_fetch_stock_data_batch_splits_symbols(self):
+        """Test that a multi-symbol download is split into per-symbol frames."""
+        index = pd.DatetimeIndex(['2024-01-02', '2024-01-03'], name='Date')
+        columns = pd.MultiIndex.from_product([['AAA', 'BBB'], ['Close', 'Volume']], names=['Ticker', 'Price'])
+        batch = pd.DataFrame([[1.0, 10, None, None], [2.0, 20, 3.0, 30]], index=index, columns=columns)
+        
+        with patch('data_fetcher.yf.download', return_value=batch) as mock_download:
+            results = self.fetcher.fetch_stock_data_batch(["AAA", "BBB", "CCC"], "5d", "1d")
+        
+        mock_download.assert_called_once()
+        self.assertEqual(len(results["AAA"]), 2)
+        self.assertEqual(len(results["BBB"]), 1)
+        self.assertTrue(results["CCC"].empty)
+        self.assertEqual(results["BBB"]['Symbol'].iloc[0], 'BBB')
+    
+    def test_fetch_stock_data_batch_keeps_exchange_timezone(self):
+        """Test that batch frames are indexed in exchange time, like Ticker.history."""
+        index = pd.DatetimeIndex(['2023-09-06 04:00', '2023-09-07 04:00'], tz='UTC', name='Date')
+        columns = pd.MultiIndex.from_product([['AAA'], ['Close']], names=['Ticker', 'Price'])
+        batch = pd.DataFrame([[1.0], [2.0]], index=index, columns=columns)
+        
+        with patch('data_fetcher.yf.download', return_value=batch) as mock_download, \
+                patch('data_fetcher._exchange_timezone', return_value='America/New_York'):
+            results = self.fetcher.fetch_stock_data_batch(["AAA"], "5d", "1d")
+        
+        self.assertFalse(mock_download.call_args.kwargs['ignore_tz'])
+        self.assertEqual(results["AAA"].index[0], pd.Timestamp('2023-09-06', tz='America/New_York'))
+        self.assertEqual(str(results["AAA"].index.tz), 'America/New_York')
+    
+    def test_fetch_stock_data_batch_drops_other_symbols_actions(self):
+        """Test that a fund's Capital Gains column is not added to stocks in the same batch."""
+        index = pd.DatetimeIndex(['2023-09-06 04:00', '2023-09-07 04:00'], tz='UTC', name='Date')
+        columns = pd.MultiIndex.from_product([['FUND', 'STOCK'], ['Close', 'Dividends', 'Capital Gains']],
+                                             names=['Ticker', 'Price'])
+        batch = pd.DataFrame([[1.0, 0.0, 0.0, 5.0, 0.0, None], [2.0, 0.0, 0.1, 6.0, 0.0, None]],
+                             index=index, columns=columns)
+        
+        with patch('data_fetcher.yf.download', return_value=batch), \
+                patch('data_fetcher._exchange_timezone', return_value='America/New_York'):
+            results = self.fetcher.fetch_stock_data_batch(["FUND", "STOCK"], "5d", "1d")
+        
+        self.assertIn('Capital Gains', results["FUND"].columns)
+        self.assertNotIn('Capital Gains', results["STOCK"].columns)
+        self.assertIn('Dividends', results["STOCK"].columns)
+    
+    def test_exchange_timezone_falls_back_to_history_metadata(self):
+        """Test that a changed private yfinance tz lookup falls back to the public metadata."""
+        ticker = MagicMock(history_metadata={'exchangeTimezoneName': 'Asia/Tokyo'})
+        ticker._get_ticker_tz.side_effect = TypeError("unexpected keyword argument 'timeout'")
+        
+        with patch('data_fetcher._get_ticker', return_value=ticker), \
+                self.assertLogs('data_fetcher', level='WARNING'):
+            self.assertEqual(data_fetcher._exchange_timezone("7203.T"), 'Asia/Tokyo')
+    
+    def test_fetch_stock_data_uses_cache(self):
+        """Test that a repeat stock fetch within the TTL is served from disk."""
+        history = pd.DataFrame({'Close': [101.0, 102.0]},
+                               index=pd.DatetimeIndex(['2024-01-02', '2024-01-03'], name='Date'))
+        ticker = MagicMock()
+        ticker.history.side_effect = lambda **kwargs: history.copy()
+        
+        with patch('data_fetcher._get_ticker', return_value=ticker):
+            first = self.fetcher.fetch_stock_data("TEST", "5d", "1d")
+            second = self.fetcher.fetch_stock_data("TEST", "5d", "1d")
+            uncached = DataFetcher(self.test_data_dir, stock_cache_ttl=0).fetch_stock_data("TEST", "5d", "1d")
+        
+        self.assertEqual(ticker.history.call_count, 2)
+        pd.testing.assert_frame_equal(first, second)
+        self.assertEqual(len(uncached), 2)
+    
     def test_list_available_data(self):
         """Test listing available data files."""
         # Create some test files
@@ -3,22 +3,27 @@
 Script to run the Calendar Diagonal Spread Analyzer Streamlit app.
 """
 
-import subprocess
 import sys
 import os
 
+# Skip the file watcher, dev-mode and usage-stats work at startup
+STREAMLIT_FLAGS = [
+    "--server.runOnSave=false",
+    "--server.fileWatcherType=none",
+    "--browser.gatherUsageStats=false",
+    "--global.developmentMode=false",
+]
+
 def main():
     """Run the Streamlit app."""
     try:
         # Check if we're in a Poetry environment
         if 'VIRTUAL_ENV' in os.environ:
-            print("Running in Poetry virtual environment...")
+            print("Running in Poetry virtual environment...", flush=True)
         
-        # Run streamlit
-        subprocess.run([sys.executable, "-m", "streamlit", "run", "app.py"], check=True)
-    except KeyboardInterrupt:
-        print("\nApp stopped by user.")
-    except subprocess.CalledProcessError as e:
+        # Replace this process with streamlit; it handles Ctrl+C itself
+        os.execvp(sys.executable, [sys.executable, "-m", "streamlit", "run", "app.py", *STREAMLIT_FLAGS])
+    except OSError as e:
         print(f"Error running Streamlit app: {e}")
         sys.exit(1)
     except Exception as e: